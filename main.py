@@ -17,32 +17,259 @@ Author: Demo
 Date: 2025
 """
 
+import asyncio
+import base64
+import functools
+import hashlib
+import json
 import os
-import io
+import queue
+import re
+import ssl
+import tempfile
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
 
-from elevenlabs.client import ElevenLabs
-from elevenlabs import Voice, VoiceSettings, play, stream, save
+import aiofiles
+import httpx
+import websockets
+from elevenlabs.client import AsyncElevenLabs
+from elevenlabs import Voice, VoiceSettings, stream
+
+try:
+    import sounddevice as sd  # Optional: raw PCM playback without mpv/ffmpeg
+except ImportError:
+    sd = None
+
+# Write buffer for audio files; chunks are flushed to disk as they arrive
+_WRITE_BUFFER_SIZE = 1 << 16
+
+# WebSocket text-to-speech endpoint, streams audio as text is sent
+_STREAM_INPUT_URL = ("wss://api.elevenlabs.io/v1/text-to-speech/{voice_id}/stream-input"
+                     "?model_id={model}&output_format={output_format}"
+                     "&optimize_streaming_latency={optimize_streaming_latency}")
+
+# Local content-addressable cache of generated audio
+_CACHE_DIR = Path(".tts_cache")
+
+# mkstemp creates files as 0600; cache files get the usual umask-based mode instead
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+# Tokens ending in "." that do not end a sentence
+_ABBREVIATIONS = ("Mr.", "Mrs.", "Ms.", "Dr.", "Prof.", "St.", "Jr.", "Sr.", "vs.", "etc.",
+                  "e.g.", "i.e.", "a.m.", "p.m.", "AM.", "PM.")
+
+
+def _split_sentences(text: str, min_length: int = 10) -> List[str]:
+    """
+    Split text on sentence boundaries for pipelined synthesis
+    
+    Args:
+        text: Text to split
+        min_length: Sentences shorter than this are merged with their neighbour
+        
+    Returns:
+        List of sentences
+    """
+    sentences: List[str] = []
+    pending = ""
+    # Decimals such as "3.5" are never split since no whitespace follows the dot
+    for part in re.split(r'(?<=[.!?])\s+', text.strip()):
+        if not part:
+            continue
+        pending = f"{pending} {part}" if pending else part
+        if pending.rsplit(None, 1)[-1] in _ABBREVIATIONS or len(pending) < min_length:
+            continue
+        sentences.append(pending)
+        pending = ""
+    
+    if pending:
+        if sentences and len(pending) < min_length:
+            sentences[-1] = f"{sentences[-1]} {pending}"
+        else:
+            sentences.append(pending)
+    return sentences
+
+
+def _cache_key(text: str, voice_id: str, model: str, settings: Optional[Dict[str, Any]] = None,
+               output_format: str = "mp3_44100_128", optimize_streaming_latency: int = 0) -> str:
+    """
+    Build the cache key for a synthesis request
+    
+    Args:
+        text: Text to convert
+        voice_id: Voice ID or name used for synthesis
+        model: Model ID
+        settings: Voice settings, if any
+        output_format: Audio format requested from the API
+        optimize_streaming_latency: Latency level; level 4 changes the audio itself
+        
+    Returns:
+        SHA-256 hex digest identifying the generated audio
+    """
+    request = {
+        "text": text,
+        "voice_id": voice_id,
+        "model": model,
+        "settings": settings or {},
+        "output_format": output_format,
+        "optimize_streaming_latency": optimize_streaming_latency,
+    }
+    return hashlib.sha256(json.dumps(request, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _audio_extension(output_format: str) -> str:
+    """
+    Get the file extension matching an API output format
+    
+    Args:
+        output_format: Audio format, e.g. mp3_44100_128 or pcm_24000
+        
+    Returns:
+        File extension without the dot, e.g. mp3 or pcm
+    """
+    return output_format.split('_')[0]
+
+
+def _with_audio_extension(output_file: str, output_format: str) -> str:
+    """
+    Replace an output file's extension with the one matching its audio format
+    
+    Args:
+        output_file: Output file path
+        output_format: Audio format written to the file
+        
+    Returns:
+        Output file path, e.g. output.pcm for pcm_24000
+    """
+    return str(Path(output_file).with_suffix(f".{_audio_extension(output_format)}"))
+
+
+def _cache_path(key: str, output_format: str) -> Path:
+    """
+    Get the cache file path for a cache key
+    
+    Args:
+        key: Cache key from _cache_key
+        output_format: Audio format, used for the file extension
+        
+    Returns:
+        Path inside the cache directory
+    """
+    return _CACHE_DIR / f"{key}.{_audio_extension(output_format)}"
 
 
 class ElevenLabsDemo:
     """ElevenLabs API demonstration class"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, optimize_streaming_latency: int = 3,
+                 output_format: str = "mp3_44100_128"):
         """
         Initialize the ElevenLabs client
         
         Args:
             api_key: ElevenLabs API key. If None, will try to get from environment variable
+            optimize_streaming_latency: Latency optimization level used for every request (0-4)
+            output_format: Default audio format for every request (e.g. mp3_44100_128, pcm_24000)
         """
         self.api_key = api_key or os.getenv('ELEVENLABS_API_KEY')
         if not self.api_key:
             raise ValueError("API key is required. Set ELEVENLABS_API_KEY environment variable or pass api_key parameter")
         
-        self.client = ElevenLabs(api_key=self.api_key)
+        # Latency optimization trades quality for time to first byte:
+        #   0 - default, no latency optimizations
+        #   1 - normal optimizations (about 50% of the possible improvement)
+        #   2 - strong optimizations (about 75% of the possible improvement)
+        #   3 - max latency optimizations
+        #   4 - max latency optimizations with the text normalizer turned off,
+        #       saving more time but possibly mispronouncing numbers and dates
+        self.optimize_streaming_latency: int = optimize_streaming_latency
+        self.output_format: str = output_format
+        
+        # Share one keep-alive HTTP/2 connection pool across all requests so
+        # only the first call pays for the TLS handshake. The SDK takes its
+        # timeout from a custom client, so keep its 60 s default instead of httpx's 5 s
+        self.http_client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=8, keepalive_expiry=60),
+            timeout=httpx.Timeout(60.0)
+        )
+        self.client = AsyncElevenLabs(api_key=self.api_key, httpx_client=self.http_client)
+        
+        # WebSocket connections share one TLS context instead of loading the CA bundle each time
+        self._ssl_context = ssl.create_default_context()
+        
+        # Cached voices.get_all() result, filled on first use
+        self._voices_cache: Optional[List[Voice]] = None
+        self._voices_by_lower_name: Dict[str, Voice] = {}
+        self._voices_by_id: Dict[str, Voice] = {}
+        # In-flight voices.get_all() request shared by concurrent callers
+        self._voices_request: Optional["asyncio.Future"] = None
+        
+        # Voice objects passed to generate(), keyed by the name or ID they were requested with
+        self._voice_obj_cache: Dict[str, Voice] = {}
+        
+        # Most recently queued playback, see _play_async()
+        self._playback_done: Optional["asyncio.Future"] = None
+    
+    async def aclose(self):
+        """
+        Close the shared HTTP connection pool
+        """
+        await self.http_client.aclose()
+    
+    async def _get_voices(self, force_refresh: bool = False) -> List[Voice]:
+        """
+        Get all available voices, fetching them from the API only once
+        
+        Args:
+            force_refresh: Ignore the cached list and query the API again
+            
+        Returns:
+            List of Voice objects
+        """
+        if self._voices_cache is None or force_refresh:
+            # Concurrent callers (e.g. demo_multiple_voices) wait on the same request
+            if self._voices_request is None or force_refresh:
+                self._voices_request = asyncio.ensure_future(self.client.voices.get_all())
+            try:
+                voices = (await self._voices_request).voices
+            finally:
+                self._voices_request = None
+            
+            self._voices_cache = voices
+            self._voices_by_lower_name = {voice.name.lower(): voice for voice in voices}
+            self._voices_by_id = {voice.voice_id: voice for voice in voices}
+        return self._voices_cache
+        
+    async def _voice(self, name_or_id: str) -> Voice:
+        """
+        Get a reusable Voice for a voice name or ID
+        
+        Names are resolved to IDs through the voices cache, so generate()
+        never has to look the voice up on its own.
+        
+        Args:
+            name_or_id: Voice name (case-insensitive) or voice ID
+            
+        Returns:
+            Voice object with voice_id set
+            
+        Raises:
+            ValueError: If no voice in the account has this name or ID
+        """
+        voice = self._voice_obj_cache.get(name_or_id)
+        if voice is None:
+            known = await self.get_voice_by_name(name_or_id) or self._voices_by_id.get(name_or_id)
+            if known is None:
+                raise ValueError(f"voice '{name_or_id}' not found")
+            # The ID is a plain string we already trust, so skip pydantic validation
+            voice = Voice.model_construct(voice_id=known.voice_id)
+            self._voice_obj_cache[name_or_id] = voice
+        return voice
         
-    def list_voices(self) -> List[Voice]:
+    async def list_voices(self) -> List[Voice]:
         """
         Get all available voices
         
@@ -50,59 +277,395 @@ class ElevenLabsDemo:
             List of Voice objects
         """
         print("📋 获取可用语音列表...")
-        voices = self.client.voices.get_all()
+        voices = await self._get_voices()
         
-        print(f"\n找到 {len(voices.voices)} 个可用语音:")
+        print(f"\n找到 {len(voices)} 个可用语音:")
         print("-" * 50)
         
-        for voice in voices.voices:
+        for voice in voices:
             print(f"🗣️  {voice.name}")
             print(f"   ID: {voice.voice_id}")
             print(f"   类别: {voice.category}")
             print(f"   描述: {voice.description or 'N/A'}")
             print()
         
-        return voices.voices
+        return voices
     
-    def basic_tts(self, text: str, voice_name: str = "Rachel", output_file: str = "output.mp3"):
+    async def basic_tts(self, text: str, voice_name: str = "Rachel", output_file: str = "output.mp3",
+                        output_format: Optional[str] = None, model: str = "eleven_flash_v2_5",
+                        wait: bool = True):
         """
         Basic text-to-speech conversion
         
         Args:
             text: Text to convert to speech
             voice_name: Name of the voice to use
-            output_file: Output audio file path
+            output_file: Output audio file path; its extension is changed to match output_format
+            output_format: Audio format requested from the API, defaults to self.output_format;
+                PCM falls back to MP3 without sounddevice
+            model: Model ID to use (Flash v2.5 by default for lowest latency)
+            wait: Wait for playback to finish; if False, return once the audio is saved
         """
+        output_format = self._playable_format(output_format)
+        output_file = _with_audio_extension(output_file, output_format)
+        
         print(f"🔊 基础文本转语音: '{text[:50]}...'")
         print(f"📢 使用语音: {voice_name}")
         
         try:
-            # Generate speech
-            audio = self.client.generate(
-                text=text,
-                voice=Voice(name=voice_name),
-                model="eleven_monolingual_v1"
+            voice = await self._voice(voice_name)
+            # Synthesize sentence by sentence; the next sentence is generated
+            # while the current one is still playing. Text without sentences
+            # is still sent as-is so the API reports the problem
+            audio, cache_file = self._cached_audio(
+                self._synthesize_sentences(_split_sentences(text) or [text], voice, model, output_format),
+                text, voice.voice_id, model, output_format
             )
             
-            # Save to file
-            save(audio, output_file)
-            print(f"✅ 音频已保存到: {output_file}")
-            
-            # Play the audio (optional)
+            # Cache the audio while playing it as it arrives
             print("🎵 播放音频...")
-            play(audio)
+            await self._play_and_save(audio, output_format, cache_file, output_file, "音频", wait)
             
         except Exception as e:
             print(f"❌ 错误: {e}")
     
-    def advanced_tts_with_settings(self, 
-                                 text: str, 
-                                 voice_id: str,
-                                 stability: float = 0.5,
-                                 similarity_boost: float = 0.5,
-                                 style: float = 0.0,
-                                 use_speaker_boost: bool = True,
-                                 output_file: str = "advanced_output.mp3"):
+    async def _synthesize_sentences(self, sentences: List[str], voice: Voice, model: str,
+                                    output_format: str) -> AsyncIterator[bytes]:
+        """
+        Stream the audio of each sentence in turn
+        
+        Args:
+            sentences: Sentences to synthesize, in playback order
+            voice: Voice to use
+            model: Model ID to use
+            output_format: Audio format requested from the API
+            
+        Returns:
+            Async iterator over the audio chunks of all sentences
+        """
+        for sentence in sentences:
+            # Streaming endpoint: playback starts on the first chunk
+            audio = await self.client.generate(
+                text=sentence,
+                voice=voice,
+                model=model,
+                stream=True,
+                optimize_streaming_latency=self.optimize_streaming_latency,
+                output_format=output_format
+            )
+            async for chunk in audio:
+                yield chunk
+    
+    async def wait_for_playback(self):
+        """
+        Wait until all queued audio has finished playing
+        
+        Raises:
+            Exception: Whatever the player raised for the most recently queued audio
+        """
+        if self._playback_done is not None:
+            await self._playback_done
+    
+    @staticmethod
+    def _report_playback_error(playback: "asyncio.Future"):
+        """
+        Print the error of a playback nobody waits for
+        
+        Args:
+            playback: Finished playback future from _play_async()
+        """
+        if not playback.cancelled() and playback.exception() is not None:
+            print(f"❌ 播放错误: {playback.exception()}")
+    
+    def _playable_format(self, output_format: Optional[str] = None) -> str:
+        """
+        Resolve the audio format to request for audio that will be played
+        
+        PCM needs sounddevice; without it, self.output_format is used
+        instead, or MP3 if that is PCM as well.
+        
+        Args:
+            output_format: Requested audio format, defaults to self.output_format
+            
+        Returns:
+            Audio format that _play_async() can play
+        """
+        output_format = output_format or self.output_format
+        if sd is None and output_format.startswith("pcm_"):
+            fallback = self.output_format if not self.output_format.startswith("pcm_") else "mp3_44100_128"
+            print(f"⚠️  未安装 sounddevice，无法播放 {output_format}，改用 {fallback}")
+            output_format = fallback
+        return output_format
+    
+    async def _play_async(self, chunks: AsyncIterator[bytes], output_format: str) -> "asyncio.Future":
+        """
+        Play audio chunks on a worker thread as they arrive
+        
+        Chunks are handed over through a queue, so downloading continues at
+        network speed while the blocking player works through the audio.
+        PCM goes straight to the audio device; only MP3 still needs stream().
+        
+        Returns once every chunk has been received, while playback may still
+        be running; await the returned future to block until it ends. Audio
+        queued while earlier audio is playing starts right after it.
+        
+        Args:
+            chunks: Audio chunks
+            output_format: Audio format of the chunks
+            
+        Returns:
+            Future that completes when playback ends, holding the player's error if it failed
+        """
+        if output_format.startswith("pcm_"):
+            if sd is None:
+                raise RuntimeError("sounddevice is required to play PCM audio")
+            # pcm_24000 -> 16-bit mono samples at 24 kHz
+            samplerate = int(output_format.split("_")[1])
+            player = functools.partial(self._play_pcm, samplerate=samplerate)
+        else:
+            player = stream
+        
+        pending: "queue.Queue" = queue.Queue()
+        previous = self._playback_done
+        
+        async def play_after_previous():
+            if previous is not None:
+                # An earlier failure is reported to whoever queued that audio
+                await asyncio.wait([previous])
+            await asyncio.get_running_loop().run_in_executor(None, player, self._iter_chunks(pending))
+        
+        playback = asyncio.ensure_future(play_after_previous())
+        self._playback_done = playback
+        try:
+            async for chunk in chunks:
+                pending.put(chunk)
+        except BaseException:
+            # The caller never gets the future, so report its error here
+            playback.add_done_callback(self._report_playback_error)
+            raise
+        finally:
+            pending.put(None)
+        return playback
+    
+    async def _synthesize_websocket(self, text: str, voice_id: str, model: str,
+                                    output_format: str) -> AsyncIterator[bytes]:
+        """
+        Stream audio over the stream-input WebSocket endpoint
+        
+        Args:
+            text: Text to convert
+            voice_id: Voice ID to use
+            model: Model ID to use
+            output_format: Audio format requested from the API
+            
+        Returns:
+            Async iterator over the audio chunks
+            
+        Raises:
+            RuntimeError: If the server sends an error frame
+        """
+        url = _STREAM_INPUT_URL.format(voice_id=voice_id, model=model, output_format=output_format,
+                                       optimize_streaming_latency=self.optimize_streaming_latency)
+        async with websockets.connect(url, ssl=self._ssl_context) as ws:
+            # Beginning of stream carries the API key, then the text, then an empty end of stream
+            await ws.send(json.dumps({"text": " ", "xi_api_key": self.api_key}))
+            await ws.send(json.dumps({"text": f"{text} ", "try_trigger_generation": True}))
+            await ws.send(json.dumps({"text": ""}))
+            
+            async for message in ws:
+                data = json.loads(message)
+                if data.get("error"):
+                    raise RuntimeError(f"WebSocket error: {data.get('message') or data['error']}")
+                if data.get("audio"):
+                    yield base64.b64decode(data["audio"])
+                if data.get("isFinal"):
+                    break
+    
+    @staticmethod
+    def _play_pcm(chunks: Iterator[bytes], samplerate: int = 24000):
+        """
+        Play raw 16-bit mono PCM chunks on the default output device
+        
+        Args:
+            chunks: PCM audio chunks
+            samplerate: Sample rate in Hz
+        """
+        remainder = b""
+        with sd.RawOutputStream(samplerate=samplerate, channels=1, dtype='int16') as out:
+            for chunk in chunks:
+                # Chunks may split a 2-byte sample; hold the odd byte back
+                chunk = remainder + chunk
+                frames_end = len(chunk) - len(chunk) % 2
+                out.write(chunk[:frames_end])
+                remainder = chunk[frames_end:]
+    
+    @staticmethod
+    def _iter_chunks(chunks: "queue.Queue") -> Iterator[bytes]:
+        """
+        Yield audio chunks from a queue until a None sentinel
+        
+        Args:
+            chunks: Queue of audio chunks
+            
+        Returns:
+            Iterator over the audio chunks
+        """
+        while True:
+            chunk = chunks.get()
+            if chunk is None:
+                return
+            yield chunk
+    
+    @staticmethod
+    async def _tee_to_file(chunks: AsyncIterator[bytes], f) -> AsyncIterator[bytes]:
+        """
+        Write audio chunks to an open file while passing them through
+        
+        Writes go through aiofiles, so a slow disk flush does not stall the
+        event loop while other requests are downloading.
+        
+        Args:
+            chunks: Audio chunks
+            f: Binary aiofiles file object to write to
+            
+        Returns:
+            Async iterator over the same audio chunks
+        """
+        async for chunk in chunks:
+            await f.write(chunk)
+            yield chunk
+    
+    def _cached_audio(self, audio: AsyncIterator[bytes], text: str, voice_id: str, model: str,
+                      output_format: str,
+                      settings: Optional[Dict[str, Any]] = None) -> Tuple[AsyncIterator[bytes], Path]:
+        """
+        Serve a request from the cache, or synthesize it and cache it on the way
+        
+        Args:
+            audio: Lazy synthesis stream, only consumed on a cache miss
+            text: Text to convert
+            voice_id: Voice ID used for synthesis
+            model: Model ID
+            output_format: Audio format requested from the API
+            settings: Voice settings, if any
+            
+        Returns:
+            Tuple of (async iterator over the audio chunks, cache file path)
+        """
+        cache_file = _cache_path(_cache_key(text, voice_id, model, settings, output_format,
+                                            self.optimize_streaming_latency),
+                                 output_format)
+        if cache_file.exists():
+            print("♻️  使用缓存音频")
+            return self._read_chunks(cache_file), cache_file
+        return self._write_to_cache(audio, cache_file), cache_file
+    
+    async def _play_and_save(self, audio: AsyncIterator[bytes], output_format: str, cache_file: Path,
+                             output_file: str, label: str, wait: bool):
+        """
+        Play audio from _cached_audio() and copy the cached file to output_file
+        
+        Args:
+            audio: Audio chunks from _cached_audio()
+            output_format: Audio format of the chunks
+            cache_file: Cache file path from _cached_audio()
+            output_file: Output file path
+            label: What was saved, for the status message
+            wait: Wait for playback to finish; if False, report playback errors in the background
+        """
+        playback = await self._play_async(audio, output_format)
+        
+        await self._copy_file(cache_file, output_file)
+        print(f"✅ {label}已保存到: {output_file}")
+        
+        if wait:
+            await playback
+        else:
+            playback.add_done_callback(self._report_playback_error)
+    
+    @staticmethod
+    async def _write_to_cache(chunks: AsyncIterator[bytes], cache_file: Path) -> AsyncIterator[bytes]:
+        """
+        Store audio chunks in the cache while passing them through
+        
+        The cache entry only appears once every chunk has been consumed, so
+        a failed or interrupted request never leaves a truncated file behind.
+        Each writer uses its own temporary file, so concurrent requests for
+        the same entry do not interleave.
+        
+        Args:
+            chunks: Audio chunks
+            cache_file: Cache file path from _cache_path
+            
+        Returns:
+            Async iterator over the same audio chunks
+            
+        Raises:
+            RuntimeError: If the stream ended without any audio
+        """
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, partial_file = tempfile.mkstemp(dir=cache_file.parent, prefix=cache_file.name + ".",
+                                            suffix=".part")
+        os.close(fd)
+        os.chmod(partial_file, 0o666 & ~_UMASK)
+        committed = False
+        try:
+            received = 0
+            async with aiofiles.open(partial_file, 'wb', buffering=_WRITE_BUFFER_SIZE) as f:
+                async for chunk in ElevenLabsDemo._tee_to_file(chunks, f):
+                    received += len(chunk)
+                    yield chunk
+            if not received:
+                raise RuntimeError("no audio received from the API")
+            os.replace(partial_file, cache_file)
+            committed = True
+        finally:
+            if not committed:
+                os.unlink(partial_file)
+    
+    @staticmethod
+    async def _read_chunks(path: Path, chunk_size: int = _WRITE_BUFFER_SIZE) -> AsyncIterator[bytes]:
+        """
+        Read an audio file in chunks
+        
+        Args:
+            path: Audio file path
+            chunk_size: Size of each chunk in bytes
+            
+        Returns:
+            Async iterator over the file contents
+        """
+        async with aiofiles.open(path, 'rb') as f:
+            while True:
+                chunk = await f.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+    
+    @staticmethod
+    async def _copy_file(src: Path, dst: str):
+        """
+        Copy a file without blocking the event loop
+        
+        Args:
+            src: Source file path
+            dst: Destination file path
+        """
+        async with aiofiles.open(dst, 'wb', buffering=_WRITE_BUFFER_SIZE) as f:
+            async for chunk in ElevenLabsDemo._read_chunks(src):
+                await f.write(chunk)
+    
+    async def advanced_tts_with_settings(self,
+                                         text: str,
+                                         voice_id: str,
+                                         stability: float = 0.5,
+                                         similarity_boost: float = 0.5,
+                                         style: float = 0.0,
+                                         use_speaker_boost: bool = True,
+                                         output_file: str = "advanced_output.mp3",
+                                         output_format: Optional[str] = None,
+                                         model: str = "eleven_multilingual_v2",
+                                         wait: bool = True):
         """
         Advanced text-to-speech with custom voice settings
         
@@ -113,8 +676,15 @@ class ElevenLabsDemo:
             similarity_boost: Similarity boost (0.0-1.0)
             style: Style exaggeration (0.0-1.0)
             use_speaker_boost: Whether to use speaker boost
-            output_file: Output file path
+            output_file: Output file path; its extension is changed to match output_format
+            output_format: Audio format requested from the API, defaults to self.output_format;
+                PCM falls back to MP3 without sounddevice
+            model: Model ID to use
+            wait: Wait for playback to finish; if False, return once the audio is saved
         """
+        output_format = self._playable_format(output_format)
+        output_file = _with_audio_extension(output_file, output_format)
+        
         print(f"🎛️  高级文本转语音设置:")
         print(f"   稳定性: {stability}")
         print(f"   相似度增强: {similarity_boost}")
@@ -123,59 +693,63 @@ class ElevenLabsDemo:
         
         try:
             # Create voice with custom settings
-            voice = Voice(
-                voice_id=voice_id,
-                settings=VoiceSettings(
-                    stability=stability,
-                    similarity_boost=similarity_boost,
-                    style=style,
-                    use_speaker_boost=use_speaker_boost
-                )
-            )
+            settings = {
+                "stability": stability,
+                "similarity_boost": similarity_boost,
+                "style": style,
+                "use_speaker_boost": use_speaker_boost,
+            }
+            # Fields are plain floats/bools, so skip pydantic validation
+            voice = Voice.model_construct(voice_id=voice_id, settings=VoiceSettings.model_construct(**settings))
             
-            # Generate speech with advanced settings
-            audio = self.client.generate(
-                text=text,
-                voice=voice,
-                model="eleven_multilingual_v2"  # Using multilingual model
+            # Generate speech with advanced settings (multilingual model by default)
+            audio, cache_file = self._cached_audio(
+                self._synthesize_sentences([text], voice, model, output_format),
+                text, voice_id, model, output_format, settings
             )
             
-            # Save and play
-            save(audio, output_file)
-            print(f"✅ 高级音频已保存到: {output_file}")
-            play(audio)
+            # Save and play, keeping only one chunk in memory at a time
+            await self._play_and_save(audio, output_format, cache_file, output_file, "高级音频", wait)
             
         except Exception as e:
             print(f"❌ 错误: {e}")
     
-    def streaming_tts(self, text: str, voice_name: str = "Rachel"):
+    async def streaming_tts(self, text: str, voice_name: str = "Rachel", output_format: Optional[str] = None,
+                            model: str = "eleven_turbo_v2"):
         """
         Streaming text-to-speech for real-time playback
         
+        Pass a PCM format such as pcm_24000 to play raw audio straight to
+        the audio device, skipping the MP3 decode step.
+        
         Args:
             text: Text to convert
             voice_name: Voice name to use
+            output_format: Audio format requested from the API, defaults to self.output_format;
+                PCM falls back to MP3 without sounddevice
+            model: Model ID to use
         """
+        output_format = self._playable_format(output_format)
+        
         print(f"🌊 流式文本转语音: '{text[:50]}...'")
         print("🎵 实时播放中...")
         
         try:
-            # Generate and stream audio
-            audio_stream = self.client.generate(
-                text=text,
-                voice=Voice(name=voice_name),
-                model="eleven_turbo_v2",  # Faster model for streaming
-                stream=True
+            voice = await self._voice(voice_name)
+            # Generate and stream audio (faster model for streaming)
+            audio_stream, _ = self._cached_audio(
+                self._synthesize_sentences([text], voice, model, output_format),
+                text, voice.voice_id, model, output_format
             )
             
             # Stream and play in real-time
-            stream(audio_stream)
+            await (await self._play_async(audio_stream, output_format))
             print("✅ 流式播放完成")
             
         except Exception as e:
             print(f"❌ 错误: {e}")
     
-    def get_voice_by_name(self, voice_name: str) -> Optional[Voice]:
+    async def get_voice_by_name(self, voice_name: str) -> Optional[Voice]:
         """
         Get voice object by name
         
@@ -185,73 +759,86 @@ class ElevenLabsDemo:
         Returns:
             Voice object if found, None otherwise
         """
-        voices = self.client.voices.get_all()
-        for voice in voices.voices:
-            if voice.name.lower() == voice_name.lower():
-                return voice
-        return None
+        if self._voices_cache is None:
+            await self._get_voices()
+        return self._voices_by_lower_name.get(voice_name.lower())
     
-    def demo_multiple_voices(self, text: str = "Hello, this is a voice demonstration."):
+    async def demo_multiple_voices(self, text: str = "Hello, this is a voice demonstration.",
+                                   model: str = "eleven_flash_v2_5"):
         """
         Demonstrate multiple voices with the same text
         
         Args:
             text: Text to speak with different voices
+            model: Model ID to use for every voice
         """
         print(f"🎭 多语音演示: '{text}'")
         
         # Common voice names (these might vary based on your subscription)
         demo_voices = ["Rachel", "Drew", "Clyde", "Paul"]
         
-        for i, voice_name in enumerate(demo_voices, 1):
+        async def synthesize(voice_name: str, output_file: str) -> str:
+            voice = await self._voice(voice_name)
+            # One WebSocket session per voice, writing chunks as they arrive
+            audio, cache_file = self._cached_audio(
+                self._synthesize_websocket(text, voice.voice_id, model, self.output_format),
+                text, voice.voice_id, model, self.output_format
+            )
+            async for _ in audio:
+                pass
+            await self._copy_file(cache_file, output_file)
+            return output_file
+        
+        # All voices are synthesized concurrently
+        results = await asyncio.gather(
+            *(synthesize(voice_name, f"demo_voice_{i}_{voice_name.lower()}.{_audio_extension(self.output_format)}")
+              for i, voice_name in enumerate(demo_voices, 1)),
+            return_exceptions=True
+        )
+        
+        for i, (voice_name, result) in enumerate(zip(demo_voices, results), 1):
             print(f"\n🗣️  语音 {i}: {voice_name}")
-            try:
-                audio = self.client.generate(
-                    text=text,
-                    voice=Voice(name=voice_name),
-                    model="eleven_monolingual_v1"
-                )
-                
-                output_file = f"demo_voice_{i}_{voice_name.lower()}.mp3"
-                save(audio, output_file)
-                print(f"   💾 保存到: {output_file}")
-                
-                # Optional: play each voice (uncomment to hear)
-                # play(audio)
-                # time.sleep(1)  # Small delay between voices
-                
-            except Exception as e:
-                print(f"   ❌ 语音 {voice_name} 失败: {e}")
+            if isinstance(result, Exception):
+                print(f"   ❌ 语音 {voice_name} 失败: {result}")
+                continue
+            
+            print(f"   💾 保存到: {result}")
+            
+            # Optional: play each voice (uncomment to hear; needs `from elevenlabs import play`)
+            # play(Path(result).read_bytes())
+            # time.sleep(1)  # Small delay between voices
 
 
-def main():
+async def main():
     """
     Main demonstration function
     """
     print("🎬 ElevenLabs API Python Demo")
     print("=" * 40)
     
+    demo: Optional[ElevenLabsDemo] = None
     try:
         # Initialize the demo class
         demo = ElevenLabsDemo()
         
         # Demo 1: List available voices
         print("\n1️⃣  演示：列出可用语音")
-        voices = demo.list_voices()
+        voices = await demo.list_voices()
         
-        # Demo 2: Basic TTS
+        # Demo 2: Basic TTS, moving on to demo 3 while the audio is still playing
         print("\n2️⃣  演示：基础文本转语音")
-        demo.basic_tts(
+        await demo.basic_tts(
             text="Hello! This is a demonstration of ElevenLabs text-to-speech API. The quality is quite impressive!",
             voice_name="Rachel",
-            output_file="demo_basic.mp3"
+            output_file="demo_basic.mp3",
+            wait=False
         )
         
         # Demo 3: Advanced TTS with custom settings
         if voices:
             print("\n3️⃣  演示：高级设置文本转语音")
             first_voice = voices[0]
-            demo.advanced_tts_with_settings(
+            await demo.advanced_tts_with_settings(
                 text="This is an advanced example with custom voice settings. Notice the difference in tone and style.",
                 voice_id=first_voice.voice_id,
                 stability=0.7,
@@ -260,18 +847,27 @@ def main():
                 output_file="demo_advanced.mp3"
             )
         
-        # Demo 4: Streaming TTS
+        # Demo 4 + 5: Streaming TTS, with the multiple voices comparison
+        # (files only, no playback) downloading at the same time
         print("\n4️⃣  演示：流式文本转语音")
-        demo.streaming_tts(
-            text="This is a streaming example. The audio should play in real-time as it's being generated.",
-            voice_name="Rachel"
+        print("5️⃣  演示：多语音对比（同时进行）")
+        await asyncio.gather(
+            demo.streaming_tts(
+                text="This is a streaming example. The audio should play in real-time as it's being generated.",
+                voice_name="Rachel",
+                output_format="pcm_24000"  # Raw PCM skips MP3 decoding when sounddevice is installed
+            ),
+            demo.demo_multiple_voices(
+                text="This is the same text spoken by different voices for comparison."
+            )
         )
         
-        # Demo 5: Multiple voices comparison
-        print("\n5️⃣  演示：多语音对比")
-        demo.demo_multiple_voices(
-            text="This is the same text spoken by different voices for comparison."
-        )
+        # Let any audio still queued from demo 2 finish; playback errors
+        # were already reported by the demo that queued the audio
+        try:
+            await demo.wait_for_playback()
+        except Exception:
+            pass
         
         print("\n🎉 所有演示完成！")
         print("📁 检查当前目录中生成的音频文件")
@@ -285,7 +881,11 @@ def main():
         
     except Exception as e:
         print(f"❌ 意外错误: {e}")
+    
+    finally:
+        if demo is not None:
+            await demo.aclose()
 
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())